@@ -1,6 +1,8 @@
 import abc
 import logging
-from typing import Dict, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
 
 # Configure a simple logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -36,6 +38,11 @@ class AlertDispatcher:
 
     def __init__(self) -> None:
         self._channels: Dict[str, AlertChannel] = {}
+        # Snapshot of the registered channels for broadcasting, rebuilt only on registration.
+        self._channel_items: Tuple[Tuple[str, AlertChannel], ...] = ()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Guards swapping the executor against concurrent broadcasts submitting to it.
+        self._executor_lock = threading.Lock()
         logger.info("AlertDispatcher initialized.")
 
     def register_channel(self, name: str, channel: AlertChannel) -> None:
@@ -51,9 +58,25 @@ class AlertDispatcher:
         """
         if name in self._channels:
             raise ValueError(f"Channel '{name}' is already registered.")
-        self._channels[name] = channel
+        with self._executor_lock:
+            self._channels[name] = channel
+            self._channel_items = tuple(self._channels.items())
+            # Size the broadcast pool to the new channel count on the next dispatch. Sends already
+            # submitted to the old pool still run to completion.
+            old_executor, self._executor = self._executor, None
+        if old_executor is not None:
+            old_executor.shutdown(wait=False)
         logger.info(f"Alert channel '{name}' registered.")
 
+    def close(self) -> None:
+        """
+        Shuts down the broadcast thread pool, waiting for in-flight sends to finish.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
     def dispatch(self, message: str, channel_name: Optional[str] = None) -> None:
         """
         Dispatches an alert message to one or all channels.
@@ -77,8 +100,35 @@ class AlertDispatcher:
                 return
             
             logger.debug("Broadcasting alert to all registered channels.")
-            for name, channel in self._channels.items():
-                try:
-                    channel.send(message)
-                except Exception as e:
-                    logger.error(f"Failed to send alert via channel '{name}': {e}", exc_info=True)
+            channel_items = self._channel_items
+            if len(channel_items) == 1:
+                self._send_safely(*channel_items[0], message)
+                return
+
+            # Send to all channels concurrently so one slow channel does not delay the others.
+            # Submitting under the lock ensures the pool cannot be shut down between lookup and submit.
+            with self._executor_lock:
+                channel_items = self._channel_items
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=len(channel_items), thread_name_prefix="alert")
+                futures = [
+                    self._executor.submit(self._send_safely, name, channel, message)
+                    for name, channel in channel_items
+                ]
+            for future in futures:
+                future.result()
+
+    @staticmethod
+    def _send_safely(name: str, channel: AlertChannel, message: str) -> None:
+        """
+        Sends a message through a channel, logging instead of raising on failure.
+
+        Args:
+            name: The name the channel was registered under.
+            channel: The channel to send the message through.
+            message: The alert message to send.
+        """
+        try:
+            channel.send(message)
+        except Exception as e:
+            logger.error(f"Failed to send alert via channel '{name}': {e}", exc_info=True)
@@ -1,15 +1,28 @@
 import os
+import sys
 import json
 import time
+import atexit
+import signal
+import string
 import logging
 import asyncio
+import collections
+import contextlib
+import aiohttp
+import orjson
 import requests
-from typing import Dict, Any, List, Optional
-
-from web3 import Web3
-from web3.types import LogReceipt, BlockData
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, AsyncIterator, Callable, List, NamedTuple, Optional, Tuple
+
+from web3 import AsyncWeb3, Web3, WebsocketProviderV2
+from web3.middleware import http_retry_request_middleware
+from web3._utils.method_formatters import log_entry_formatter
+from web3.providers.rpc import HTTPProvider
+from web3.types import LogReceipt, BlockData, Middleware, RPCEndpoint, RPCResponse
 from web3.exceptions import TransactionNotFound
 from dotenv import load_dotenv
+from eth_abi import decode as abi_decode
 
 # --- Basic Configuration ---
 # Load environment variables from a .env file for security and flexibility.
@@ -29,12 +42,23 @@ logger = logging.getLogger(__name__)
 # This allows for easy adjustments without modifying the core logic.
 CONFIG = {
     "SOURCE_CHAIN_RPC_URL": os.getenv("SOURCE_CHAIN_RPC_URL", "https://rpc.sepolia.org"),
+    "SOURCE_CHAIN_WS_URL": os.getenv("SOURCE_CHAIN_WS_URL", ""), # WebSocket endpoint used when USE_WEBSOCKET is enabled
+    "USE_WEBSOCKET": os.getenv("USE_WEBSOCKET", "false").lower() in ("1", "true", "yes"), # Push logs via eth_subscribe instead of polling
     "BRIDGE_CONTRACT_ADDRESS": os.getenv("BRIDGE_CONTRACT_ADDRESS", "0x0000000000000000000000000000000000000000"), # Placeholder address
     "DESTINATION_API_ENDPOINT": os.getenv("DESTINATION_API_ENDPOINT", "https://api.mock-destination-chain.com/mint"),
     "POLL_INTERVAL_SECONDS": 15,
     "CONFIRMATION_BLOCKS": 6, # Number of blocks to wait for to consider a transaction final (mitigates reorgs)
     "MAX_RETRY_ATTEMPTS": 5,
-    "RETRY_DELAY_SECONDS": 5
+    "MAX_DISPATCH_ROUNDS": 5, # Dispatch rounds (of MAX_RETRY_ATTEMPTS attempts each) before a failing mint is dead-lettered
+    "RETRY_DELAY_SECONDS": 5,
+    "CONFIRMATION_CHECK_SECONDS": 2, # How often a pushed log is re-checked for enough confirmations
+    "BLOCK_NUMBER_TTL_MS": int(os.getenv("BLOCK_NUMBER_TTL_MS", 1000)), # How long a fetched chain head is reused
+    "LOG_CHUNK_BLOCKS": 2000, # Initial block span of a single eth_getLogs call when catching up
+    "MAX_LOG_CHUNK_BLOCKS": 10000, # Upper bound the adaptive chunk size may grow to
+    "STATE_FILE": os.getenv("STATE_FILE", "bega_mon.state.json"), # Where the last scanned block is checkpointed
+    "DEAD_LETTER_FILE": os.getenv("DEAD_LETTER_FILE", "bega_mon.dead_letter.jsonl"), # Where mints that could not be dispatched are recorded
+    "MAX_REPLAY_BLOCKS": 10000, # Checkpoints further behind the head than this are ignored on startup
+    "SEEN_LOGS_CACHE_SIZE": 10000 # Number of recently processed logs remembered for de-duplication
 }
 
 # --- Contract ABI ---
@@ -82,71 +106,374 @@ BRIDGE_CONTRACT_ABI = json.loads('''
 ]
 ''')
 
+# Event signatures and topic hashes are constants, so they are derived once at import time.
+TOKENS_LOCKED_SIG = "TokensLocked(address,address,uint256,bytes32,address)"
+TOKENS_LOCKED_TOPIC = Web3.to_hex(Web3.keccak(text=TOKENS_LOCKED_SIG))
+
+# Errors that indicate the node connection itself is broken, as opposed to a bad request or response.
+_CONNECTION_ERRORS = (ConnectionError, requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+def _snake_case(name: str) -> str:
+    """Converts a camelCase ABI argument name (e.g. 'destinationChainId') to snake_case."""
+    return ''.join(f"_{char.lower()}" if char.isupper() else char for char in name).lstrip('_')
+
+def _http_retry_except_get_logs_middleware(make_request: Callable[[RPCEndpoint, Any], RPCResponse], w3: Web3) -> Callable[[RPCEndpoint, Any], RPCResponse]:
+    """Applies web3's HTTP retry middleware to every call except eth_getLogs.
+
+    A log query that times out should be split up by the chunker right away, not repeated at full size.
+    """
+    retrying_request = http_retry_request_middleware(make_request, w3)
+
+    def middleware(method: RPCEndpoint, params: Any) -> RPCResponse:
+        if method == 'eth_getLogs':
+            return make_request(method, params)
+        return retrying_request(method, params)
+    return middleware
+
+def _orjson_default(obj: Any) -> Any:
+    """Serializes the web3 types orjson does not handle natively (HexBytes, AttributeDict)."""
+    if isinstance(obj, bytes):
+        return Web3.to_hex(obj)
+    if hasattr(obj, 'items'):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class OrjsonHTTPProvider(HTTPProvider):
+    """An HTTPProvider that (de)serializes JSON-RPC payloads with orjson instead of the stdlib json module."""
+
+    _middlewares: Tuple[Middleware, ...] = (_http_retry_except_get_logs_middleware,)
+
+    def __init__(self, endpoint_uri: str, session: requests.Session, **kwargs: Any):
+        """Initializes the provider to post every request through `session`.
+
+        web3 keeps its own session per thread, so calls made from asyncio.to_thread workers would
+        otherwise bypass the given session and its tuned connection pool.
+        """
+        super().__init__(endpoint_uri, **kwargs)
+        self._session = session
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        request_kwargs = dict(self.get_request_kwargs())
+        request_kwargs.setdefault('timeout', 10)
+        response = self._session.post(self.endpoint_uri, data=self.encode_rpc_request(method, params), **request_kwargs)
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+    def encode_rpc_request(self, method: RPCEndpoint, params: Any) -> bytes:
+        rpc_dict = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or [],
+            "id": next(self.request_counter),
+        }
+        return orjson.dumps(rpc_dict, default=_orjson_default)
+
+    def decode_rpc_response(self, raw_response: bytes) -> RPCResponse:
+        return orjson.loads(raw_response)
+
 class BlockchainConnector:
     """Handles all direct interactions with a blockchain node via Web3.py."""
 
-    def __init__(self, rpc_url: str):
+    def __init__(self, rpc_url: str, ws_url: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
         """Initializes the connector with a specific RPC endpoint.
 
         Args:
-            rpc_url (str): The HTTP/WSS URL of the blockchain node.
+            rpc_url (str): The HTTP URL of the blockchain node.
+            ws_url (Optional[str]): The WebSocket URL of the node, required only for log subscriptions.
+            config (Optional[Dict[str, Any]]): Retry, caching and chunking settings. Defaults to CONFIG.
         """
+        config = config or CONFIG
         self.rpc_url = rpc_url
+        self.ws_url = ws_url
+        # Settings read on every retry or poll are bound once, coerced to their proper types.
+        self._max_retries = int(config['MAX_RETRY_ATTEMPTS'])
+        self._retry_delay = float(config['RETRY_DELAY_SECONDS'])
+        self._block_number_ttl = float(config['BLOCK_NUMBER_TTL_MS']) / 1000
+        self._log_chunk_blocks = int(config['LOG_CHUNK_BLOCKS'])
+        self._max_log_chunk_blocks = int(config['MAX_LOG_CHUNK_BLOCKS'])
         self.web3 = None
-        self.connect()
-
-    def connect(self) -> None:
-        """Establishes a connection to the blockchain node with retry logic."""
+        # A single persistent session is shared by the Web3 provider and raw JSON-RPC batches,
+        # so both reuse the same keep-alive connections to the node.
+        self.session = requests.Session()
+        # Size the keep-alive pool for bursts of concurrent RPC calls. Retries are deliberately left to
+        # web3's retry middleware, which skips eth_getLogs so the log chunker sees timeouts and shrinks its ranges.
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Connection': 'keep-alive'})
+        self._block_number_cache: Optional[Tuple[int, float]] = None # (block number, monotonic fetch time)
+        self._connect_sync()
+
+    def _connect_once(self) -> None:
+        """Makes a single connection attempt, raising if the node cannot be reached."""
+        self.web3 = Web3(OrjsonHTTPProvider(self.rpc_url, session=self.session))
+        if not self.web3.is_connected():
+            raise ConnectionError("Web3 provider reports not connected.")
+        logger.info("Successfully connected to blockchain node.")
+        chain_id = self.web3.eth.chain_id
+        logger.info(f"Connected to Chain ID: {chain_id}")
+
+    def _connect_sync(self) -> None:
+        """Establishes a connection with blocking retry logic, for use before the event loop is running."""
         logger.info(f"Attempting to connect to blockchain node at {self.rpc_url}...")
-        for attempt in range(CONFIG['MAX_RETRY_ATTEMPTS']):
+        for attempt in range(self._max_retries):
             try:
-                self.web3 = Web3(Web3.HTTPProvider(self.rpc_url))
-                if self.web3.is_connected():
-                    logger.info("Successfully connected to blockchain node.")
-                    chain_id = self.web3.eth.chain_id
-                    logger.info(f"Connected to Chain ID: {chain_id}")
-                    return
-                else:
-                    raise ConnectionError("Web3 provider reports not connected.")
+                self._connect_once()
+                return
             except Exception as e:
                 logger.error(f"Connection attempt {attempt + 1} failed: {e}")
-                if attempt < CONFIG['MAX_RETRY_ATTEMPTS'] - 1:
-                    time.sleep(CONFIG['RETRY_DELAY_SECONDS'] * (attempt + 1)) # Exponential backoff
+                if attempt < self._max_retries - 1:
+                    time.sleep(self._retry_delay * (attempt + 1)) # Exponential backoff
                 else:
                     logger.critical("Could not establish connection to the blockchain node. Exiting.")
                     raise
 
+    async def connect(self) -> None:
+        """Re-establishes a connection with retry logic, backing off without blocking the event loop."""
+        logger.info(f"Attempting to connect to blockchain node at {self.rpc_url}...")
+        for attempt in range(self._max_retries):
+            try:
+                # The connection check makes blocking HTTP calls, so it runs on a worker thread.
+                await asyncio.to_thread(self._connect_once)
+                return
+            except Exception as e:
+                logger.error(f"Connection attempt {attempt + 1} failed: {e}")
+                if attempt < self._max_retries - 1:
+                    await asyncio.sleep(self._retry_delay * (attempt + 1)) # Exponential backoff
+                else:
+                    logger.critical("Could not establish connection to the blockchain node.")
+                    raise
+
     def get_latest_block_number(self) -> int:
-        """Fetches the most recent block number from the blockchain."""
+        """Fetches the most recent block number, reusing a value fetched within BLOCK_NUMBER_TTL_MS."""
+        if self._block_number_cache is not None:
+            block_number, fetched_at = self._block_number_cache
+            if time.monotonic() - fetched_at < self._block_number_ttl:
+                return block_number
         try:
-            return self.web3.eth.block_number
+            block_number = self.web3.eth.block_number
         except Exception as e:
-            logger.error(f"Failed to get latest block number: {e}. Attempting to reconnect...")
-            self.connect() # Attempt to re-establish connection
-            return self.web3.eth.block_number
+            # Reconnecting is left to the caller, which can back off without blocking the event loop.
+            logger.error(f"Failed to get latest block number: {e}")
+            raise
+        self._block_number_cache = (block_number, time.monotonic())
+        return block_number
+
+    def invalidate_block_cache(self) -> None:
+        """Discards the cached block number so the next lookup fetches a fresh chain head."""
+        self._block_number_cache = None
 
-    def get_logs_for_range(self, from_block: int, to_block: int, address: str, topics: List[str]) -> List[LogReceipt]:
-        """Retrieves event logs for a specific contract and topic within a block range."""
+    def get_logs_for_range(self, from_block: int, to_block: int, address: str, topics: List[Any]) -> List[LogReceipt]:
+        """Retrieves event logs for a specific contract and topic within a block range.
+
+        Errors are propagated so callers such as `get_logs_chunked` can react to them.
+        """
         logger.debug(f"Fetching logs from block {from_block} to {to_block} for address {address}.")
-        try:
-            return self.web3.eth.get_logs({
-                'fromBlock': from_block,
-                'toBlock': to_block,
-                'address': address,
-                'topics': topics
-            })
-        except Exception as e:
-            logger.error(f"Error fetching logs for range {from_block}-{to_block}: {e}")
-            return []
+        return self.web3.eth.get_logs({
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': address,
+            'topics': topics
+        })
+
+    def get_logs_chunked(self, from_block: int, to_block: int, address: str, topics: List[Any], chunk: Optional[int] = None) -> List[LogReceipt]:
+        """Retrieves event logs for a large block range by splitting it into adaptive sub-ranges.
+
+        The sub-range is halved whenever the node rejects a query (e.g. "query returned more than
+        N results") or the response times out, and doubled (up to MAX_LOG_CHUNK_BLOCKS) after three
+        successive successful queries. Connection errors are raised at once, so the caller can reconnect.
+
+        Args:
+            from_block (int): The first block of the range (inclusive).
+            to_block (int): The last block of the range (inclusive).
+            address (str): The checksummed contract address to filter logs by.
+            topics (List[Any]): The topic filter for the log query.
+            chunk (Optional[int]): The initial sub-range size. Defaults to LOG_CHUNK_BLOCKS.
+
+        Returns:
+            List[LogReceipt]: All logs found in the range, in block order.
+
+        Raises:
+            ValueError, requests.exceptions.ReadTimeout: If a single-block query is still rejected or times out.
+            requests.exceptions.RequestException: On any other HTTP or connection error.
+        """
+        chunk = chunk or self._log_chunk_blocks
+        logs: List[LogReceipt] = []
+        successes = 0
+        start = from_block
+        while start <= to_block:
+            end = min(start + chunk - 1, to_block)
+            try:
+                logs.extend(self.get_logs_for_range(start, end, address, topics))
+            except (ValueError, requests.exceptions.ReadTimeout) as e:
+                # Node errors surface as ValueError; a read timeout means the node was reachable but the query too heavy.
+                if chunk == 1:
+                    raise
+                chunk = max(1, chunk // 2)
+                successes = 0
+                logger.warning(f"Log query for range {start}-{end} failed: {e}. Retrying with chunk size {chunk}.")
+                continue
+
+            start = end + 1
+            successes += 1
+            if successes >= 3:
+                chunk = min(chunk * 2, self._max_log_chunk_blocks)
+                successes = 0
+        # A catch-up scan may have taken a while, so make sure the next poll sees the current head.
+        self.invalidate_block_cache()
+        return logs
+
+    def batch_poll(self, from_block: int, address: str, topics: List[Any]) -> Tuple[int, List[LogReceipt]]:
+        """Fetches the latest block number and all logs from `from_block` onwards in a single round-trip.
+
+        Both calls are posted as one raw JSON-RPC batch over the connector's persistent session.
+
+        Args:
+            from_block (int): The first block to include in the log query.
+            address (str): The checksummed contract address to filter logs by.
+            topics (List[Any]): The topic filter for the log query.
+
+        Returns:
+            Tuple[int, List[LogReceipt]]: The latest block number and the logs from `from_block` to that head.
+        """
+        logger.debug(f"Batch polling head and logs from block {from_block} for address {address}.")
+        log_filter = {
+            'fromBlock': from_block,
+            'toBlock': 'latest',
+            'address': address,
+            'topics': topics
+        }
+        raw_block_number, raw_logs = self._batch_request([
+            ("eth_blockNumber", []),
+            ("eth_getLogs", [{**log_filter, 'fromBlock': hex(from_block)}]),
+        ])
+        latest_block, logs = int(raw_block_number, 16), [log_entry_formatter(log) for log in raw_logs]
+        self._block_number_cache = (latest_block, time.monotonic())
+        return latest_block, logs
+
+    @contextlib.asynccontextmanager
+    async def subscribe_logs(self, address: str, topics: List[Any]) -> AsyncIterator[AsyncIterator[LogReceipt]]:
+        """Opens an `eth_subscribe` logs subscription over a persistent WebSocket connection.
+
+        The subscription is active as soon as the context is entered, so callers can backfill
+        over HTTP before consuming pushed logs without leaving a gap.
+
+        Args:
+            address (str): The checksummed contract address to filter logs by.
+            topics (List[Any]): The topic filter for the subscription.
+
+        Yields:
+            AsyncIterator[LogReceipt]: An iterator over logs as the node pushes them.
+        """
+        if not self.ws_url:
+            raise ValueError("A WebSocket URL is required to subscribe to logs.")
+        logger.info(f"Opening WebSocket log subscription at {self.ws_url}...")
+        async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(self.ws_url)) as w3:
+            await w3.eth.subscribe('logs', {'address': address, 'topics': topics})
+
+            async def pushed_logs() -> AsyncIterator[LogReceipt]:
+                async for response in w3.ws.process_subscriptions():
+                    yield log_entry_formatter(response['result'])
+
+            yield pushed_logs()
+
+    def _batch_request(self, calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        """Sends several JSON-RPC calls as one batched HTTP POST and returns their results in order.
+
+        Raises:
+            ValueError: If the node rejects the batch, returns an error for any call in it, or omits a response.
+        """
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            for request_id, (method, params) in enumerate(calls)
+        ]
+        response = self.session.post(
+            self.rpc_url,
+            data=orjson.dumps(payload),
+            headers={'Content-Type': 'application/json'},
+            timeout=10
+        )
+        response.raise_for_status()
+        body = orjson.loads(response.content)
+        # Providers that cap or do not support batching answer with a single error object instead of a list.
+        if not isinstance(body, list):
+            raise ValueError(f"JSON-RPC batch of {len(calls)} calls was rejected: {body}")
+        # Batch responses may arrive in any order, so they are matched back up by id.
+        results = {item.get('id'): item for item in body if isinstance(item, dict)}
+        for request_id, (method, _) in enumerate(calls):
+            if request_id not in results:
+                raise ValueError(f"JSON-RPC batch response is missing the result of call {method} (id {request_id}).")
+            if 'error' in results[request_id]:
+                raise ValueError(f"JSON-RPC call {method} failed: {results[request_id]['error']}")
+        return [results[request_id].get('result') for request_id in range(len(calls))]
+
+class _EventDecoder(NamedTuple):
+    """The argument layout of a single event, split into its indexed topics and its data section.
+
+    Argument names are stored in snake_case, as they appear in processed events.
+    """
+    name: str
+    indexed_names: List[str]
+    indexed_types: List[str]
+    data_names: List[str]
+    data_types: List[str]
 
 class EventProcessor:
     """Parses and validates raw event logs into a structured format."""
 
-    def __init__(self, abi: List[Dict[str, Any]]):
-        """Initializes the processor with the contract's ABI."""
-        self.contract = Web3().eth.contract(abi=abi) # Create a temporary contract object for event decoding
+    def __init__(self, abi: List[Dict[str, Any]], events: Optional[Dict[str, str]] = None):
+        """Initializes the processor with the contract's ABI.
+
+        Args:
+            abi (List[Dict[str, Any]]): The contract ABI containing the monitored events.
+            events (Optional[Dict[str, str]]): Maps the name of each event to decode to its topic hash.
+                Defaults to just 'TokensLocked'.
+        """
+        events = events or {"TokensLocked": TOKENS_LOCKED_TOPIC}
+        # Decoding only needs the argument types, so logs are decoded with eth_abi directly instead of
+        # through a provider-less Web3 contract. One decoder per event is built up front, keyed by its topic hash.
+        event_abis = {entry['name']: entry for entry in abi if entry.get('type') == 'event'}
+        self._events: Dict[bytes, _EventDecoder] = {}
+        for name, topic in events.items():
+            inputs = event_abis[name]['inputs']
+            indexed = [arg for arg in inputs if arg['indexed']]
+            data = [arg for arg in inputs if not arg['indexed']]
+            self._events[Web3.to_bytes(hexstr=topic)] = _EventDecoder(
+                name=name,
+                indexed_names=[_snake_case(arg['name']) for arg in indexed],
+                indexed_types=[arg['type'] for arg in indexed],
+                data_names=[_snake_case(arg['name']) for arg in data],
+                data_types=[arg['type'] for arg in data]
+            )
         logger.info("EventProcessor initialized.")
 
+    @staticmethod
+    def _decode_args(decoder: _EventDecoder, log: LogReceipt) -> Dict[str, Any]:
+        """Decodes the indexed topics and the data section of a log into named event arguments.
+
+        Raises:
+            ValueError: If the log's topics do not match the event's indexed arguments.
+        """
+        topics = log['topics'][1:]
+        if len(topics) != len(decoder.indexed_types):
+            raise ValueError(f"Expected {len(decoder.indexed_types)} indexed topics for {decoder.name}, got {len(topics)}.")
+        data = log['data']
+        if isinstance(data, str):
+            data = Web3.to_bytes(hexstr=data)
+
+        args = {}
+        for name, abi_type, topic in zip(decoder.indexed_names, decoder.indexed_types, topics):
+            args[name] = abi_decode([abi_type], bytes(topic))[0]
+        args.update(zip(decoder.data_names, abi_decode(decoder.data_types, bytes(data))))
+        for name, abi_type in zip(decoder.indexed_names + decoder.data_names, decoder.indexed_types + decoder.data_types):
+            if abi_type == 'address':
+                # Match web3's contract decoding, which returns checksummed addresses.
+                args[name] = Web3.to_checksum_address(args[name])
+            elif abi_type.startswith(('uint', 'int')):
+                # APIs often prefer amounts as strings; a uint256 is converted once here rather than per dispatch.
+                args[f"{name}_str"] = format(args[name], 'd')
+        return args
+
     def process_log(self, log: LogReceipt) -> Optional[Dict[str, Any]]:
         """Processes a single raw log into a structured dictionary.
 
@@ -154,68 +481,110 @@ class EventProcessor:
             log (LogReceipt): The raw log data from get_logs.
 
         Returns:
-            Optional[Dict[str, Any]]: A dictionary with parsed event data or None if parsing fails.
+            Optional[Dict[str, Any]]: A dictionary with the event name, transaction hash, block number and
+                the event's own arguments (in snake_case), or None if parsing fails.
         """
         try:
-            # The web3.py contract object can decode logs for its known events
-            event_data = self.contract.events.TokensLocked().process_log(log)
+            # The first topic identifies the event, which selects the matching prebuilt decoder.
+            decoder = self._events.get(bytes(log['topics'][0]))
+            if decoder is None:
+                logger.warning(f"Skipping log with unknown event topic in tx {log['transactionHash'].hex()}")
+                return None
             processed_event = {
-                'transaction_hash': event_data['transactionHash'].hex(),
-                'block_number': event_data['blockNumber'],
-                'user': event_data['args']['user'],
-                'token': event_data['args']['token'],
-                'amount': event_data['args']['amount'],
-                'destination_chain_id': event_data['args']['destinationChainId'].hex(),
-                'recipient': event_data['args']['recipient']
+                'event': decoder.name,
+                # Hashes stay raw bytes here; they are hex-formatted once when the dispatch payload is built.
+                'transaction_hash': log['transactionHash'],
+                'block_number': log['blockNumber'],
+                **self._decode_args(decoder, log)
             }
-            logger.info(f"Successfully processed event from tx {processed_event['transaction_hash']}")
             return processed_event
         except Exception as e:
             # This can happen if the log topic matches but the data format is unexpected.
             logger.error(f"Failed to process log: {log}. Error: {e}")
             return None
 
+class PermanentDispatchError(Exception):
+    """Raised when the destination API rejects a mint request in a way that retrying cannot fix."""
+
 class CrossChainDispatcher:
     """Simulates dispatching the cross-chain action to a destination chain relayer/API."""
 
-    def __init__(self, api_endpoint: str):
-        """Initializes the dispatcher with the target API endpoint."""
+    def __init__(self, api_endpoint: str, config: Optional[Dict[str, Any]] = None):
+        """Initializes the dispatcher with the target API endpoint and its retry settings (defaults to CONFIG)."""
+        config = config or CONFIG
         self.api_endpoint = api_endpoint
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'User-Agent': 'bega_mon-bridge-simulator/1.0'
-        })
+        self._max_retries = int(config['MAX_RETRY_ATTEMPTS'])
+        self._retry_delay = float(config['RETRY_DELAY_SECONDS'])
+        # The aiohttp session must be created inside a running event loop, so it is built on first use.
+        self.session: Optional[aiohttp.ClientSession] = None
         logger.info(f"CrossChainDispatcher initialized for endpoint: {self.api_endpoint}")
 
-    def dispatch_mint_request(self, event_data: Dict[str, Any]) -> bool:
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Returns the shared HTTP session, creating it on first use."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=32, keepalive_timeout=120),
+                headers={
+                    'Content-Type': 'application/json',
+                    'User-Agent': 'bega_mon-bridge-simulator/1.0'
+                }
+            )
+        return self.session
+
+    async def close(self) -> None:
+        """Closes the underlying HTTP session, if one was opened."""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    @staticmethod
+    def build_mint_payload(event_data: Dict[str, Any]) -> Dict[str, str]:
+        """Formats a processed event into the JSON payload expected by the destination API."""
+        return {
+            # bytes.hex is called unbound so HexBytes values never get a second '0x' prefix.
+            "sourceTransactionHash": f"0x{bytes.hex(event_data['transaction_hash'])}",
+            "recipient": event_data['recipient'],
+            "token": event_data['token'],
+            "amount": event_data['amount_str'],
+            "destinationChainId": f"0x{bytes.hex(event_data['destination_chain_id'])}"
+        }
+
+    async def dispatch_mint_request(self, event_data: Dict[str, Any]) -> bool:
         """Sends a POST request to the destination API to trigger a minting operation.
 
         Args:
             event_data (Dict[str, Any]): The processed event data.
 
         Returns:
-            bool: True if the request was successful, False otherwise.
+            bool: True if the request was successful, False if it still failed after all retries.
+
+        Raises:
+            PermanentDispatchError: If the API answers with a 4xx status other than 429, which is not retried.
         """
-        payload = {
-            "sourceTransactionHash": event_data['transaction_hash'],
-            "recipient": event_data['recipient'],
-            "token": event_data['token'],
-            "amount": str(event_data['amount']), # APIs often prefer amounts as strings
-            "destinationChainId": event_data['destination_chain_id']
-        }
+        payload = self.build_mint_payload(event_data)
         logger.info(f"Dispatching mint request for tx {payload['sourceTransactionHash']}...")
 
-        for attempt in range(CONFIG['MAX_RETRY_ATTEMPTS']):
+        body = orjson.dumps(payload)
+        session = self._get_session()
+        for attempt in range(self._max_retries):
             try:
-                response = self.session.post(self.api_endpoint, json=payload, timeout=10)
-                response.raise_for_status() # Raises an HTTPError for bad responses (4xx or 5xx)
-                logger.info(f"Successfully dispatched request. API response: {response.json()}")
+                # The session already sends 'Content-Type: application/json', so the orjson bytes go out as-is.
+                async with session.post(self.api_endpoint, data=body, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                    response.raise_for_status() # Raises a ClientResponseError for bad responses (4xx or 5xx)
+                    raw_response = await response.read()
+                # The mint was accepted once the status check passed, so a body that is not JSON is logged as text.
+                try:
+                    api_response = orjson.loads(raw_response)
+                except orjson.JSONDecodeError:
+                    api_response = raw_response.decode(errors='replace')
+                logger.info(f"Successfully dispatched request. API response: {api_response}")
                 return True
-            except requests.exceptions.RequestException as e:
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Other client errors mean the request itself was refused, so sending it again cannot succeed.
+                if isinstance(e, aiohttp.ClientResponseError) and 400 <= e.status < 500 and e.status != 429:
+                    raise PermanentDispatchError(f"Mint request for tx {payload['sourceTransactionHash']} was rejected: {e}") from e
                 logger.warning(f"Dispatch attempt {attempt + 1} failed for tx {payload['sourceTransactionHash']}: {e}")
-                if attempt < CONFIG['MAX_RETRY_ATTEMPTS'] - 1:
-                    time.sleep(CONFIG['RETRY_DELAY_SECONDS'])
+                if attempt < self._max_retries - 1:
+                    await asyncio.sleep(self._retry_delay)
                 else:
                     logger.error(f"Failed to dispatch mint request for tx {payload['sourceTransactionHash']} after all retries.")
                     return False
@@ -223,23 +592,63 @@ class CrossChainDispatcher:
 class BridgeContractMonitor:
     """The main orchestrator that monitors the bridge contract for events."""
 
+    # Events fetched from the bridge contract, mapped to their topic hashes. All of them are
+    # queried with a single eth_getLogs call by OR-ing their topics in the first topic position.
+    MONITORED_EVENTS: Dict[str, str] = {"TokensLocked": TOKENS_LOCKED_TOPIC}
+    # The subset of monitored events that trigger a mint on the destination chain.
+    MINT_EVENTS = frozenset({"TokensLocked"})
+
     def __init__(self, config: Dict[str, Any]):
         """Initializes the monitor and its dependencies."""
+        if config.get('USE_WEBSOCKET') and not config.get('SOURCE_CHAIN_WS_URL'):
+            raise ValueError("USE_WEBSOCKET is enabled but SOURCE_CHAIN_WS_URL is not set.")
         self.config = config
-        self.connector = BlockchainConnector(config["SOURCE_CHAIN_RPC_URL"])
-        self.processor = EventProcessor(BRIDGE_CONTRACT_ABI)
-        self.dispatcher = CrossChainDispatcher(config["DESTINATION_API_ENDPOINT"])
-        self.contract_address = self.connector.web3.to_checksum_address(config["BRIDGE_CONTRACT_ADDRESS"])
+        # Settings read on every poll are bound once, coerced to their proper types.
+        self._confirmations = int(config['CONFIRMATION_BLOCKS'])
+        self._poll_interval = float(config['POLL_INTERVAL_SECONDS'])
+        self._retry_delay = float(config['RETRY_DELAY_SECONDS'])
+        self._confirmation_check_interval = float(config['CONFIRMATION_CHECK_SECONDS'])
+        self._log_chunk_blocks = int(config['LOG_CHUNK_BLOCKS'])
+        self._seen_cache_size = int(config['SEEN_LOGS_CACHE_SIZE'])
+        self._max_dispatch_rounds = int(config['MAX_DISPATCH_ROUNDS'])
+        self.dead_letter_path = config.get("DEAD_LETTER_FILE", "bega_mon.dead_letter.jsonl")
+        self.connector = BlockchainConnector(config["SOURCE_CHAIN_RPC_URL"], config.get("SOURCE_CHAIN_WS_URL"), config)
+        self.processor = EventProcessor(BRIDGE_CONTRACT_ABI, self.MONITORED_EVENTS)
+        self.dispatcher = CrossChainDispatcher(config["DESTINATION_API_ENDPOINT"], config)
+        self.contract_address = Web3.to_checksum_address(config["BRIDGE_CONTRACT_ADDRESS"])
+        self.state_path = config.get("STATE_FILE", "bega_mon.state.json")
         self.last_scanned_block = self._get_starting_block()
-        # Get the event topic hash for 'TokensLocked' to filter logs efficiently
-        self.event_topic = self.connector.web3.keccak(text="TokensLocked(address,address,uint256,bytes32,address)").hex()
+        # Make sure the latest progress is persisted on a graceful shutdown as well.
+        atexit.register(self._save_checkpoint)
+        self._last_seen_head: Optional[int] = None # Chain head seen by the previous poll, if any
+        # Recently processed (transactionHash, logIndex) keys, oldest first, to skip duplicate logs.
+        self._seen: "collections.OrderedDict[Tuple[bytes, int], None]" = collections.OrderedDict()
+        # (blockHash, transactionHash, logIndex) keys of pushed logs the node later reported as removed
+        # by a reorg, mapped to their block number so they can be evicted once that block is handled.
+        self._removed: Dict[Tuple[bytes, bytes, int], int] = {}
+        # Mint events whose dispatch failed, with the number of rounds they failed in. They are retried
+        # and hold the checkpoint back until they succeed or run out of rounds and are dead-lettered.
+        self._failed_events: List[Tuple[Dict[str, Any], int]] = []
+        # Whether a WebSocket subscription is open and its backfill queued, so every new log will be pushed.
+        self._subscription_live = False
+        # The topic hashes of the monitored events, used to filter logs efficiently
+        self.event_topics: List[str] = list(self.MONITORED_EVENTS.values())
 
     def _get_starting_block(self) -> int:
         """Determines the starting block for scanning, e.g., from a state file or current block."""
-        # In a real application, this would load the last processed block from a file/database.
-        # For this simulation, we start from a few blocks behind the current head.
         try:
             current_block = self.connector.get_latest_block_number()
+            checkpoint = self._load_checkpoint()
+            if checkpoint is not None and checkpoint >= current_block - self.config['MAX_REPLAY_BLOCKS']:
+                # A checkpoint ahead of the head just means this node lags the one used last time;
+                # rewinding would re-dispatch mints that were already sent, so wait for it to catch up.
+                if checkpoint > current_block:
+                    logger.warning(f"Checkpointed block {checkpoint} is ahead of the node's head {current_block}; waiting for it to catch up.")
+                logger.info(f"Resuming scan after checkpointed block: {checkpoint}")
+                return checkpoint
+            if checkpoint is not None:
+                logger.warning(f"Ignoring checkpointed block {checkpoint}: older than the replay window of head {current_block}.")
+            # Without a usable checkpoint, we start from a few blocks behind the current head.
             start_block = max(0, current_block - 100) # Start scanning the last 100 blocks
             logger.info(f"Determined starting block for scan: {start_block}")
             return start_block
@@ -247,53 +656,324 @@ class BridgeContractMonitor:
             logger.critical(f"Could not determine starting block. Error: {e}")
             exit(1)
 
+    def _load_checkpoint(self) -> Optional[int]:
+        """Reads the last scanned block from the state file, or returns None if there is none."""
+        try:
+            with open(self.state_path) as f:
+                return int(json.load(f)['last_scanned_block'])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not read state file {self.state_path}: {e}")
+            return None
+
+    def _save_checkpoint(self) -> None:
+        """Atomically writes the last scanned block to the state file."""
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'last_scanned_block': self.last_scanned_block}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            # os.replace is atomic, so a crash mid-write never leaves a truncated state file behind.
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.error(f"Failed to write state file {self.state_path}: {e}")
+
+    def _dedup(self, logs: List[LogReceipt]) -> List[LogReceipt]:
+        """Filters out logs that were already processed, e.g. after a retried chunk or at reorg boundaries."""
+        unique_logs = []
+        for log in logs:
+            key = (bytes(log['transactionHash']), log['logIndex'])
+            if key in self._seen:
+                logger.debug(f"Skipping duplicate log {log['logIndex']} of tx {log['transactionHash'].hex()}")
+                continue
+            self._seen[key] = None
+            if len(self._seen) > self._seen_cache_size:
+                self._seen.popitem(last=False)
+            unique_logs.append(log)
+        return unique_logs
+
+    def _is_mint_event(self, processed_event: Optional[Dict[str, Any]]) -> bool:
+        """Returns whether a processed event should be relayed as a mint request."""
+        if processed_event is None:
+            return False
+        if processed_event['event'] not in self.MINT_EVENTS:
+            logger.info(f"No action registered for {processed_event['event']} event in block {processed_event['block_number']}.")
+            return False
+        return True
+
+    def _fetch_logs(self, from_block: int, to_block: int) -> List[LogReceipt]:
+        """Fetches the monitored events of a block range in adaptive chunks."""
+        return self.connector.get_logs_chunked(
+            from_block=from_block,
+            to_block=to_block,
+            address=self.contract_address,
+            topics=[self.event_topics] # Nested list: match any of the monitored events
+        )
+
     async def run_simulation_loop(self) -> None:
-        """The main async loop that continuously scans for new blocks and events."""
+        """The main async loop that continuously scans for new blocks and events.
+
+        Polling and dispatching run as a pipeline: a producer fetches confirmed logs on a worker
+        thread and feeds them into a bounded queue, while a consumer dispatches them. The next
+        poll therefore overlaps with the previous range's dispatches, and the queue bound
+        applies backpressure if dispatching falls behind.
+        """
         logger.info("Starting bridge event monitoring loop...")
+        # Items are (log, to_block) pairs; a None log marks the end of a scanned range.
+        queue: "asyncio.Queue[Tuple[Optional[LogReceipt], int]]" = asyncio.Queue(maxsize=2 * self._log_chunk_blocks)
+        consumer = asyncio.create_task(self._dispatch_scanned_logs(queue))
+        try:
+            await self._poll_for_logs(queue)
+        finally:
+            consumer.cancel()
+
+    async def _poll_for_logs(self, queue: "asyncio.Queue[Tuple[Optional[LogReceipt], int]]") -> None:
+        """Producer: polls for newly confirmed logs and queues them, followed by an end-of-range marker."""
+        queued_block = self.last_scanned_block # Last block whose logs were handed to the consumer
         while True:
             try:
-                latest_block = self.connector.get_latest_block_number()
-                # The 'to_block' is calculated to ensure we only process confirmed blocks.
-                to_block = latest_block - self.config['CONFIRMATION_BLOCKS']
-
-                if to_block > self.last_scanned_block:
-                    logger.info(f"Scanning blocks from {self.last_scanned_block + 1} to {to_block}...")
-                    logs = self.connector.get_logs_for_range(
-                        from_block=self.last_scanned_block + 1,
-                        to_block=to_block,
-                        address=self.contract_address,
-                        topics=[self.event_topic]
+                from_block = queued_block + 1
+                # The RPC calls block, so they run on a worker thread to keep dispatches progressing.
+                if self._last_seen_head is None or self._last_seen_head - from_block >= self._log_chunk_blocks:
+                    # Catching up on a backlog: a single open-ended query could be enormous, so the
+                    # confirmed range is fetched in adaptive chunks instead.
+                    latest_block = await asyncio.to_thread(self.connector.get_latest_block_number)
+                    # The 'to_block' is calculated to ensure we only process confirmed blocks.
+                    to_block = latest_block - self._confirmations
+                    logs = []
+                    if to_block > queued_block:
+                        logs = await asyncio.to_thread(self._fetch_logs, from_block, to_block)
+                else:
+                    # Fetch the chain head and the pending logs together to save a round-trip per poll.
+                    latest_block, logs = await asyncio.to_thread(
+                        self.connector.batch_poll,
+                        from_block,
+                        self.contract_address,
+                        [self.event_topics] # Nested list: match any of the monitored events
                     )
+                    to_block = latest_block - self._confirmations
+                    # Logs from still-unconfirmed blocks are dropped here and picked up again by a later poll.
+                    logs = [log for log in logs if log['blockNumber'] <= to_block]
+                self._last_seen_head = latest_block
 
+                if to_block > queued_block:
+                    logger.info(f"Scanning blocks from {from_block} to {to_block}...")
                     if logs:
                         logger.info(f"Found {len(logs)} potential event(s) in block range.")
-                        for log in logs:
-                            processed_event = self.processor.process_log(log)
-                            if processed_event:
-                                self.dispatcher.dispatch_mint_request(processed_event)
                     else:
                         logger.info("No new events found in this range.")
-
-                    # Update state ONLY after successful processing
-                    self.last_scanned_block = to_block
-                    # In a real app, you would save `self.last_scanned_block` to a persistent file here.
-
+                    for log in logs:
+                        await queue.put((log, to_block))
+                    await queue.put((None, to_block))
+                    queued_block = to_block
                 else:
-                    logger.info(f"No new confirmed blocks to process. Current head: {latest_block}, last scanned: {self.last_scanned_block}")
+                    logger.info(f"No new confirmed blocks to process. Current head: {latest_block}, last scanned: {queued_block}")
 
             except Exception as e:
                 logger.error(f"An unexpected error occurred in the main loop: {e}", exc_info=True)
+                # The open-ended batch poll may be what failed (e.g. too many results), so fall back to
+                # the adaptive chunker on the next poll instead of repeating the same query.
+                self._last_seen_head = None
+                if isinstance(e, _CONNECTION_ERRORS):
+                    try:
+                        await self.connector.connect() # Attempt to re-establish the node connection
+                    except Exception:
+                        pass # Already logged by the connector; the next poll will retry
 
             # Wait for the next poll interval
-            await asyncio.sleep(self.config['POLL_INTERVAL_SECONDS'])
+            await asyncio.sleep(self._poll_interval)
+
+    async def _dispatch_scanned_logs(self, queue: "asyncio.Queue[Tuple[Optional[LogReceipt], int]]") -> None:
+        """Consumer: dispatches each scanned range's events, then checkpoints the range."""
+        range_logs: List[LogReceipt] = []
+        while True:
+            log, to_block = await queue.get()
+            if log is not None:
+                range_logs.append(log)
+                continue
+            try:
+                processed_events = [event for event in map(self.processor.process_log, self._dedup(range_logs)) if self._is_mint_event(event)]
+                await self._dispatch_events(processed_events)
+                # The checkpoint stops short of any event that still failed to dispatch.
+                self._advance_checkpoint(to_block)
+            except Exception as e:
+                logger.error(f"Failed to dispatch events up to block {to_block}: {e}", exc_info=True)
+            range_logs = []
+
+    async def run_websocket_loop(self) -> None:
+        """Monitors the contract through a WebSocket log subscription instead of polling.
+
+        Pushed logs are queued for a consumer that waits for CONFIRMATION_BLOCKS before dispatching.
+        On every (re)connect, the blocks since the last checkpoint are backfilled over HTTP so
+        nothing emitted while disconnected is missed; duplicates are dropped by the consumer.
+        """
+        logger.info("Starting bridge event monitoring via WebSocket subscription...")
+        queue: "asyncio.Queue[LogReceipt]" = asyncio.Queue()
+        consumer = asyncio.create_task(self._consume_pushed_logs(queue))
+        try:
+            while True:
+                try:
+                    async with self.connector.subscribe_logs(self.contract_address, [self.event_topics]) as pushed_logs:
+                        # A head cached before the subscription opened could miss blocks mined in between,
+                        # which neither the backfill nor the subscription would then cover.
+                        self.connector.invalidate_block_cache()
+                        latest_block = await asyncio.to_thread(self.connector.get_latest_block_number)
+                        if latest_block > self.last_scanned_block:
+                            logger.info(f"Backfilling blocks from {self.last_scanned_block + 1} to {latest_block} over HTTP...")
+                            for log in await asyncio.to_thread(self._fetch_logs, self.last_scanned_block + 1, latest_block):
+                                queue.put_nowait(log)
+                        self._subscription_live = True
+                        try:
+                            async for log in pushed_logs:
+                                if log.get('removed'):
+                                    self._removed[self._reorg_key(log)] = log['blockNumber']
+                                    continue
+                                queue.put_nowait(log)
+                        finally:
+                            self._subscription_live = False
+                except Exception as e:
+                    logger.error(f"WebSocket log subscription failed: {e}. Reconnecting...", exc_info=True)
+                await asyncio.sleep(self._retry_delay)
+        finally:
+            consumer.cancel()
+
+    @staticmethod
+    def _reorg_key(log: LogReceipt) -> Tuple[bytes, bytes, int]:
+        """Identifies a log within a specific block, so a re-mined copy in another block is not confused with it."""
+        return bytes(log['blockHash']), bytes(log['transactionHash']), log['logIndex']
+
+    async def _dispatch_events(self, processed_events: List[Dict[str, Any]]) -> None:
+        """Dispatches mint events concurrently, together with a retry of previously failed ones.
+
+        Events whose dispatch fails or raises are kept in `_failed_events` for the next round, up to
+        MAX_DISPATCH_ROUNDS rounds. Events that run out of rounds or are rejected outright by the API
+        are written to the dead-letter file instead, so they no longer hold the checkpoint back.
+        """
+        events = self._failed_events + [(event, 0) for event in processed_events]
+        if not events:
+            return
+        # Dispatch all events concurrently rather than one round-trip at a time.
+        results = await asyncio.gather(*(self.dispatcher.dispatch_mint_request(event) for event, _ in events), return_exceptions=True)
+        self._failed_events = []
+        for (event, failed_rounds), result in zip(events, results):
+            if result is True:
+                continue
+            if isinstance(result, PermanentDispatchError):
+                self._dead_letter(event, str(result))
+                continue
+            if isinstance(result, BaseException):
+                logger.error(f"Mint dispatch for event in block {event['block_number']} raised: {result}", exc_info=result)
+            if failed_rounds + 1 >= self._max_dispatch_rounds:
+                self._dead_letter(event, f"Dispatch failed in {failed_rounds + 1} rounds.")
+            else:
+                self._failed_events.append((event, failed_rounds + 1))
+        if self._failed_events:
+            logger.warning(f"{len(self._failed_events)} mint request(s) failed; they will be retried and the checkpoint is held before them.")
+
+    def _dead_letter(self, event: Dict[str, Any], reason: str) -> None:
+        """Appends a mint that will not be dispatched to the dead-letter file, for manual replay."""
+        record = {
+            'block_number': event['block_number'],
+            'payload': self.dispatcher.build_mint_payload(event),
+            'reason': reason
+        }
+        logger.error(f"Giving up on mint for tx {record['payload']['sourceTransactionHash']}: {reason}")
+        try:
+            with open(self.dead_letter_path, 'ab') as f:
+                f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            # The record is still in the log above, so the mint can be recovered from there.
+            logger.error(f"Failed to write dead-letter file {self.dead_letter_path}: {e}. Record: {record}")
+
+    def _advance_checkpoint(self, block_number: int) -> None:
+        """Moves the persisted scan position forward to `block_number`, never backwards.
+
+        The position never passes a block with a dispatch that is still being retried, so a restart replays it.
+        """
+        if self._failed_events:
+            block_number = min(block_number, min(event['block_number'] for event, _ in self._failed_events) - 1)
+        if block_number > self.last_scanned_block:
+            self.last_scanned_block = block_number
+            self._save_checkpoint()
+
+    async def _wait_for_confirmations(self, block_number: int) -> None:
+        """Waits until `block_number` is CONFIRMATION_BLOCKS deep, retrying through transient RPC failures."""
+        confirmed_at = block_number + self._confirmations
+        while True:
+            try:
+                if await asyncio.to_thread(self.connector.get_latest_block_number) >= confirmed_at:
+                    return
+            except Exception as e:
+                logger.warning(f"Could not check confirmations for block {block_number}: {e}. Retrying...")
+            await asyncio.sleep(self._confirmation_check_interval)
+
+    async def _consume_pushed_logs(self, queue: "asyncio.Queue[LogReceipt]") -> None:
+        """Dispatches queued logs once their block has enough confirmations.
+
+        A block is checkpointed only once a log from a later block is dequeued, or once the queue
+        is idle. By then the block is past the confirmation depth, so all of its logs were pushed
+        long ago and have been handled. While the subscription is live, an idle queue also moves
+        the checkpoint up to the confirmed head, so a quiet contract does not leave a long backfill.
+        """
+        pending_block: Optional[int] = None # Block of the last handled log, not yet checkpointed
+        while True:
+            try:
+                log = await asyncio.wait_for(queue.get(), timeout=self._confirmation_check_interval)
+            except asyncio.TimeoutError:
+                if self._failed_events:
+                    await self._dispatch_events([])
+                checkpoint_block = pending_block
+                if self._subscription_live:
+                    try:
+                        latest_block = await asyncio.to_thread(self.connector.get_latest_block_number)
+                        checkpoint_block = max(checkpoint_block or 0, latest_block - self._confirmations)
+                    except Exception as e:
+                        logger.warning(f"Could not fetch the chain head to advance the checkpoint: {e}")
+                if checkpoint_block is not None:
+                    self._advance_checkpoint(checkpoint_block)
+                pending_block = None
+                continue
+
+            if pending_block is not None and log['blockNumber'] > pending_block:
+                self._advance_checkpoint(pending_block)
+                pending_block = None
+
+            await self._wait_for_confirmations(log['blockNumber'])
+            # Removals for earlier blocks can no longer match anything still queued.
+            self._removed = {key: block for key, block in self._removed.items() if block >= log['blockNumber']}
+            if self._reorg_key(log) in self._removed:
+                logger.warning(f"Skipping log of tx {log['transactionHash'].hex()} removed by a reorg.")
+                continue
+            try:
+                processed_events = [event for event in map(self.processor.process_log, self._dedup([log])) if self._is_mint_event(event)]
+                await self._dispatch_events(processed_events)
+            except Exception as e:
+                logger.error(f"Failed to handle pushed log: {e}", exc_info=True)
+            pending_block = max(pending_block or 0, log['blockNumber'])
+
+    async def run(self) -> None:
+        """Runs the monitoring loop and releases the dispatcher's HTTP session when it stops."""
+        try:
+            if self.config.get('USE_WEBSOCKET'):
+                await self.run_websocket_loop()
+            else:
+                await self.run_simulation_loop()
+        finally:
+            await self.dispatcher.close()
 
 
 def main():
     """Entry point for the script."""
     logger.info("--- BegaMon Cross-Chain Bridge Monitor Simulation ---_n")
+    # Turn SIGTERM into a normal exit so the atexit checkpoint handler still runs.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     try:
         monitor = BridgeContractMonitor(CONFIG)
-        asyncio.run(monitor.run_simulation_loop())
+        asyncio.run(monitor.run())
     except (KeyboardInterrupt, SystemExit):
         logger.info("Simulation stopped by user.")
     except Exception as e:
@@ -305,9 +985,11 @@ if __name__ == "__main__":
 
 
 # @-internal-utility-start
+_API_KEY_ALPHABET = (string.ascii_letters + string.digits).encode()
+
 def is_api_key_valid_5619(api_key: str):
     """Checks if the API key format is valid. Added on 2025-11-03 13:47:02"""
-    import re
-    return bool(re.match(r'^[a-zA-Z0-9]{32}$', api_key))
+    # Deleting every allowed byte leaves nothing behind only if the key is purely ASCII alphanumeric.
+    return len(api_key) == 32 and not api_key.encode().translate(None, _API_KEY_ALPHABET)
 # @-internal-utility-end
 